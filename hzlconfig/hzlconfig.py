@@ -30,6 +30,7 @@
 """Compiles the Hazelnet configuration from a JSON file into binary files
 for each Client and the Server that could be parsed easily by the DLLs."""
 
+import datetime
 import os
 from dataclasses import dataclass, field
 from typing import List
@@ -38,6 +39,7 @@ from . import structs, jsonparser
 
 MAGIC_NUMBER_CLIENT = b'HZLc\0'
 MAGIC_NUMBER_SERVER = b'HZLs\0'
+_IO_BUFSIZE = 128 * 1024
 
 
 @dataclass
@@ -48,18 +50,23 @@ class Config:
     @classmethod
     def from_json_file(cls, input_file_name: str) -> 'Config':
         dictionaries = jsonparser.JsonConfigParser(input_file_name)
+        header_type = dictionaries.bus['headerType']
+        groups_total = len(dictionaries.groups)
+        clients_total = len(dictionaries.clients)
+        groups_of_client = {client['sid']: []
+                            for client in dictionaries.clients}
+        for group in dictionaries.groups:
+            for sid in set(group['clients']):
+                groups_of_client[sid].append(group)
         clients = []
         for client in dictionaries.clients:
-            groups_this_client_is_in = [
-                group for group in dictionaries.groups
-                if client['sid'] in group['clients']
-            ]
+            groups_this_client_is_in = groups_of_client[client['sid']]
             client_config = structs.ClientConfig(
                 timeout_req_to_res_millis=client[
                     'timeoutReqToResMillis'],
                 ltk=client['ltk'],
                 sid=client['sid'],
-                header_type=dictionaries.bus['headerType'],
+                header_type=header_type,
                 amount_of_groups=len(groups_this_client_is_in),
             )
             client_group_configs = [
@@ -80,9 +87,9 @@ class Config:
             )
             clients.append(new_client)
         server_config = structs.ServerConfig(
-            header_type=dictionaries.bus['headerType'],
-            amount_of_groups=len(dictionaries.groups),
-            amount_of_clients=len(dictionaries.clients),
+            header_type=header_type,
+            amount_of_groups=groups_total,
+            amount_of_clients=clients_total,
         )
         server_side_client_configs = [
             structs.ServerSideClientConfig(
@@ -118,102 +125,125 @@ class Config:
                         endianness: str,
                         padding_value: int) -> None:
         os.makedirs(output_dir_name, exist_ok=True)
-        self._clients_to_binary_file(output_dir_name, endianness,
-                                     padding_value)
-        self._server_to_binary_file(output_dir_name, endianness, padding_value)
-
-    def _clients_to_binary_file(self, output_dir_name: str,
-                                endianness: str,
-                                padding_value: int) -> None:
         for client in self.clients:
-            out_file_name = os.path.join(
-                output_dir_name,
-                f'hzl_HardcodedConfig{client.nickname}.hzl'
-            )
-            with open(out_file_name, 'bw+') as client_bin_file:
-                client_bin_file.write(MAGIC_NUMBER_CLIENT)
-                client_bin_file.write(client.config.to_bytes(endianness,
-                                                             padding_value))
-                for group in client.groups:
-                    client_bin_file.write(group.to_bytes(endianness,
-                                                         padding_value))
-
-    def _server_to_binary_file(self, output_dir_name: str,
-                               endianness: str,
-                               padding_value: int) -> None:
-        out_file_name = os.path.join(
-            output_dir_name,
-            f'hzl_HardcodedConfig{self.server.nickname}.hzl'
-        )
-        with open(out_file_name, 'bw+') as server_bin_file:
-            server_bin_file.write(MAGIC_NUMBER_SERVER)
-            server_bin_file.write(self.server.config.to_bytes(endianness,
-                                                              padding_value))
-            for client in self.server.clients:
-                server_bin_file.write(client.to_bytes(endianness,
-                                                      padding_value))
-            for group in self.server.groups:
-                server_bin_file.write(group.to_bytes(endianness,
-                                                     padding_value))
+            _client_to_binary_file(
+                client,
+                _output_file_name(output_dir_name, client.nickname, 'hzl'),
+                endianness, padding_value)
+        _server_to_binary_file(
+            self.server,
+            _output_file_name(output_dir_name, self.server.nickname, 'hzl'),
+            endianness, padding_value)
 
     def to_c_source_files(self, output_dir_name: str,
                           padding_value: int) -> None:
         os.makedirs(output_dir_name, exist_ok=True)
-        self._write_server_to_c_source_file(output_dir_name, padding_value)
-        self._write_clients_to_c_source_files(output_dir_name, padding_value)
-        self._write_server_header_file(output_dir_name)
-        self._write_client_c_header_file(output_dir_name)
-
-    def _write_server_to_c_source_file(self, output_dir_name: str,
-                                       padding_value: int):
-        out_file_name = os.path.join(
-            output_dir_name,
-            f'hzl_HardcodedConfig{self.server.nickname}.c'
-        )
-        with open(out_file_name, 'w', encoding='UTF-8') as server_c_file:
-            server_c_file.write(self.server.to_c_source(padding_value))
-
-    def _write_clients_to_c_source_files(self, output_dir_name: str,
-                                         padding_value: int):
+        now = structs.utc_now()  # Same timestamp in all files of this run
+        _server_to_c_source_file(
+            self.server,
+            _output_file_name(output_dir_name, self.server.nickname, 'c'),
+            padding_value, now)
         for client in self.clients:
-            out_file_name = os.path.join(
-                output_dir_name,
-                f'hzl_HardcodedConfig{client.nickname}.c'
-            )
-            with open(out_file_name, 'w', encoding='UTF-8') as client_c_file:
-                client_c_file.write(client.to_c_source(padding_value))
+            _client_to_c_source_file(
+                client,
+                _output_file_name(output_dir_name, client.nickname, 'c'),
+                padding_value, now)
+        _write_server_header_file(
+            _output_file_name(output_dir_name, 'Server', 'h'), now)
+        _write_client_c_header_file(
+            _output_file_name(output_dir_name, 'Client', 'h'), now)
 
-    def _write_server_header_file(self, output_dir_name):
-        out_file_name = os.path.join(
-            output_dir_name,
-            f'hzl_HardcodedConfigServer.h'
-        )
-        template_file_name = os.path.join(
-            os.path.dirname(__file__),
-            'server_h_template.h',
-        )
-        with open(out_file_name, 'w', encoding='UTF-8') as client_h_file, \
-            open(template_file_name, encoding='UTF-8') as template:
-            formatted = template.read().format(
-                year=structs.current_year(),
-                timestamp=structs.iso_timestamp_with_utc_tz())
-            client_h_file.write(formatted)
-
-    def _write_client_c_header_file(self, output_dir_name):
-        out_file_name = os.path.join(
-            output_dir_name,
-            f'hzl_HardcodedConfigClient.h'
-        )
-        template_file_name = os.path.join(
-            os.path.dirname(__file__),
-            'client_h_template.h',
-        )
-        with open(out_file_name, 'w', encoding='UTF-8') as client_h_file, \
-            open(template_file_name, encoding='UTF-8') as template:
-            formatted = template.read().format(
-                year=structs.current_year(),
-                timestamp=structs.iso_timestamp_with_utc_tz())
-            client_h_file.write(formatted)
+
+def _output_file_name(output_dir_name: str,
+                      nickname: str,
+                      extension: str) -> str:
+    return os.path.join(output_dir_name,
+                        f'hzl_HardcodedConfig{nickname}.{extension}')
+
+
+def _client_to_binary_file(client: structs.Client,
+                           out_file_name: str,
+                           endianness: str,
+                           padding_value: int) -> None:
+    parts = [
+        MAGIC_NUMBER_CLIENT,
+        client.config.to_bytes(endianness, padding_value),
+        structs.ClientGroupConfig.pack_many(client.groups, endianness,
+                                            padding_value),
+    ]
+    _write_binary_file(out_file_name, parts)
+
+
+def _server_to_binary_file(server: structs.Server,
+                           out_file_name: str,
+                           endianness: str,
+                           padding_value: int) -> None:
+    parts = [
+        MAGIC_NUMBER_SERVER,
+        server.config.to_bytes(endianness, padding_value),
+        structs.ServerSideClientConfig.pack_many(server.clients, endianness,
+                                                 padding_value),
+        structs.ServerGroupConfig.pack_many(server.groups, endianness,
+                                            padding_value),
+    ]
+    _write_binary_file(out_file_name, parts)
+
+
+def _server_to_c_source_file(server: structs.Server,
+                             out_file_name: str,
+                             padding_value: int,
+                             now: datetime.datetime) -> None:
+    _write_text_file(out_file_name, server.to_c_source(padding_value, now))
+
+
+def _client_to_c_source_file(client: structs.Client,
+                             out_file_name: str,
+                             padding_value: int,
+                             now: datetime.datetime) -> None:
+    _write_text_file(out_file_name, client.to_c_source(padding_value, now))
+
+
+def _write_server_header_file(out_file_name: str,
+                              now: datetime.datetime) -> None:
+    formatted = structs.format_template(
+        'server_h_template.h',
+        year=now.year,
+        timestamp=now.isoformat())
+    _write_text_file(out_file_name, formatted)
+
+
+def _write_client_c_header_file(out_file_name: str,
+                                now: datetime.datetime) -> None:
+    formatted = structs.format_template(
+        'client_h_template.h',
+        year=now.year,
+        timestamp=now.isoformat())
+    _write_text_file(out_file_name, formatted)
+
+
+def _write_binary_file(out_file_name: str, parts: List[bytes]) -> None:
+    if not hasattr(os, 'writev'):  # Not available on Windows
+        with open(out_file_name, 'wb', buffering=_IO_BUFSIZE) as out_file:
+            out_file.write(b''.join(parts))
+        return
+    # Hand all parts to the kernel in one syscall, without joining them
+    fd = os.open(out_file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        written = os.writev(fd, parts)
+        total = sum(len(part) for part in parts)
+        if written < total:  # Partial write, finish the rest
+            remaining = memoryview(b''.join(parts))[written:]
+            while remaining:
+                remaining = remaining[os.write(fd, remaining):]
+    finally:
+        os.close(fd)
+
+
+def _write_text_file(out_file_name: str, text: str) -> None:
+    # A single write of the pre-encoded text, skipping the TextIOWrapper.
+    # Newlines are translated as in text mode to keep the platform's ones.
+    with open(out_file_name, 'wb', buffering=_IO_BUFSIZE) as out_file:
+        out_file.write(text.replace('\n', os.linesep).encode('UTF-8'))
 
 
 def compile_json_file(json_file_name: str,
@@ -27,16 +27,20 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
 # THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import json
 from typing import Dict, List, Union
 
+try:
+    import orjson as json  # Faster C parser, accepts bytes directly
+except ImportError:
+    import json
+
 TypeJsonDict = Dict[
     str, Union[bool, int, bytes, List, None, str, 'TypeJsonDict']]
 
 
 class JsonConfigParser:
     def __init__(self, input_file_name: str):
-        with open(input_file_name, encoding='UTF-8') as json_file:
+        with open(input_file_name, 'rb') as json_file:
             config = json.loads(json_file.read())
         self.clients: List[TypeJsonDict] = config['clients']
         self.groups: List[TypeJsonDict] = config['groups']
@@ -66,20 +70,20 @@ class JsonConfigParser:
         assert len(self.groups) > 0
         assert (self.groups[0]['gid'] == 0)
         assert (self.groups[-1]['gid'] == len(self.groups) - 1)
-        for group in self.groups[1:]:
-            bitmap = 0
-            for sid in group['clients']:
-                bitmap |= 1 << (sid - 1)
-            group['clientSidsInGroupBitmap'] = bitmap
 
     def _inject_defaults_into_clients(self):
+        bus = self.bus
+        defaults = self.defaults
+        extend = self._extend_dict_no_overwrite
         for client in self.clients:
-            self._extend_dict_no_overwrite(client, self.bus)
-            self._extend_dict_no_overwrite(client, self.defaults)
+            extend(client, bus)
+            extend(client, defaults)
 
     def _inject_defaults_into_groups(self):
+        defaults = self.defaults
+        extend = self._extend_dict_no_overwrite
         for group in self.groups:
-            self._extend_dict_no_overwrite(group, self.defaults)
+            extend(group, defaults)
 
     def _sort_clients_by_sid(self):
         self.clients.sort(key=lambda client: client['sid'])
@@ -91,12 +95,17 @@ class JsonConfigParser:
         self.groups[0]['clientSidsInGroupBitmap'] = 0xFFFFFFFF  # Broadcast
         self.groups[0]['clients'] = list(
             client['sid'] for client in self.clients)
+        amount_of_clients = len(self.clients)
+        bitmap_len = (amount_of_clients + 7) // 8
         for group in self.groups[1:]:
-            bitmap = 0
+            assert all(1 <= sid <= amount_of_clients
+                       for sid in group['clients'])
+            # Set the bits byte-wise to avoid a new big int per SID
+            bitmap = bytearray(bitmap_len)
             for sid in group['clients']:
-                bitmap |= 1 << (sid - 1)
-                assert (1 <= sid <= len(self.clients))
-            group['clientSidsInGroupBitmap'] = bitmap
+                bitmap[(sid - 1) >> 3] |= 1 << ((sid - 1) & 7)
+            group['clientSidsInGroupBitmap'] = int.from_bytes(bitmap,
+                                                              'little')
 
     def _convert_ltks_to_bytes(self):
         for client in self.clients:
@@ -106,9 +115,8 @@ class JsonConfigParser:
     @staticmethod
     def _extend_dict_no_overwrite(original: TypeJsonDict,
                                   extension: TypeJsonDict):
-        for k, v in extension.items():
-            if k not in original:
-                original[k] = v
+        for k in extension.keys() - original.keys():
+            original[k] = extension[k]
 
 
 def ltk_from_string(ltk: str) -> bytes:
@@ -29,22 +29,52 @@
 
 import abc
 import datetime
+import functools
+import itertools
 import os.path
+import string
 import struct
 from dataclasses import dataclass, field
-from typing import ByteString, Iterable, List
+from typing import ByteString, Iterable, List, Optional, Sequence, Tuple
+
+
+_HEX = tuple(f'{i:02X}' for i in range(256))
 
 
 def c_source_array_bytes(binary: Iterable[int]) -> str:
+    # Raises ValueError for values outside 0..255, as packing them does
+    binary = bytes(binary)
     return (
         '\n'
         '    {\n'
-        + ''.join(f'        0x{i:02X},\n' for i in binary)
+        + ''.join('        0x' + _HEX[i] + ',\n' for i in binary)
         + '    }'
     )
 
 
 class ConfigStruct(abc.ABC):
+    __slots__ = ()
+    _LE: struct.Struct
+    _BE: struct.Struct
+    _SIZE: int
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not getattr(cls.binformat, '__isabstractmethod__', False):
+            # Compile the format once per subclass, not once per packing
+            cls._LE = struct.Struct('<' + cls.binformat())
+            cls._BE = struct.Struct('>' + cls.binformat())
+            cls._SIZE = cls._LE.size
+
+    @classmethod
+    def _struct(cls, endianness: str, amount: int = 1) -> struct.Struct:
+        if amount == 1:
+            if endianness == '<':
+                return cls._LE
+            if endianness in ('>', '!'):
+                return cls._BE
+        return struct.Struct(endianness + cls.binformat() * amount)
+
     @classmethod
     @abc.abstractmethod
     def binformat(cls) -> str:
@@ -54,13 +84,34 @@ class ConfigStruct(abc.ABC):
     def to_c_source(self, padding_value: int) -> str:
         pass
 
-    @abc.abstractmethod
     def to_bytes(self, endianness: str, padding_value: int) -> bytes:
+        return self._struct(endianness).pack(
+            *self._pack_values(padding_value))
+
+    @abc.abstractmethod
+    def _pack_values(self, padding_value: int) -> Tuple:
+        """Values to pack with binformat(), in order."""
         pass
 
+    @classmethod
+    def pack_many(cls,
+                  configs: Sequence['ConfigStruct'],
+                  endianness: str,
+                  padding_value: int,
+                  ) -> bytes:
+        """Packs all configs back to back with a single struct.pack(),
+        same as joining their to_bytes()."""
+        if endianness in ('', '@'):
+            # Native alignment could pad between the repeated formats
+            return b''.join(config.to_bytes(endianness, padding_value)
+                            for config in configs)
+        packer = cls._struct(endianness, len(configs))
+        return packer.pack(*itertools.chain.from_iterable(
+            config._pack_values(padding_value) for config in configs))
+
     @classmethod
     def from_bytes(cls, binary: ByteString) -> 'ConfigStruct':
-        fields = struct.unpack(cls.binformat(), binary)
+        fields = cls._LE.unpack(binary)
         return cls(*fields)
 
     @classmethod
@@ -68,13 +119,21 @@ class ConfigStruct(abc.ABC):
                         binary: ByteString,
                         amount: int,
                         ) -> Iterable['ConfigStruct']:
-        total_len = struct.calcsize(cls.binformat()) * amount
+        total_len = cls._SIZE * amount
         return (cls(*fields) for fields
-                in struct.iter_unpack(cls.binformat(), binary[:total_len]))
+                in cls._LE.iter_unpack(binary[:total_len]))
 
 
 @dataclass
 class ClientConfig(ConfigStruct):
+    __slots__ = (
+        'timeout_req_to_res_millis',
+        'ltk',
+        'sid',
+        'header_type',
+        'amount_of_groups',
+    )
+
     timeout_req_to_res_millis: int
     ltk: bytes
     sid: int
@@ -85,10 +144,8 @@ class ClientConfig(ConfigStruct):
     def binformat(cls) -> str:
         return 'H16sBBB1s'
 
-    def to_bytes(self, endianness: str, padding_value: int) -> bytes:
-        assert struct.calcsize(self.binformat()) == 22
-        return struct.pack(
-            endianness + self.binformat(),
+    def _pack_values(self, padding_value: int) -> Tuple:
+        return (
             self.timeout_req_to_res_millis,
             self.ltk,
             self.sid,
@@ -111,6 +168,13 @@ class ClientConfig(ConfigStruct):
 
 @dataclass
 class ClientGroupConfig(ConfigStruct):
+    __slots__ = (
+        'max_ctrnonce_delay',
+        'max_silence_interval_millis',
+        'session_renewal_duration_millis',
+        'gid',
+    )
+
     max_ctrnonce_delay: int
     max_silence_interval_millis: int
     session_renewal_duration_millis: int
@@ -120,10 +184,8 @@ class ClientGroupConfig(ConfigStruct):
     def binformat(cls) -> str:
         return 'IHHB3s'
 
-    def to_bytes(self, endianness: str, padding_value: int) -> bytes:
-        assert struct.calcsize(self.binformat()) == 12
-        return struct.pack(
-            endianness + self.binformat(),
+    def _pack_values(self, padding_value: int) -> Tuple:
+        return (
             self.max_ctrnonce_delay,
             self.max_silence_interval_millis,
             self.session_renewal_duration_millis,
@@ -148,25 +210,29 @@ class Client:
     config: ClientConfig
     groups: List[ClientGroupConfig] = field(default_factory=list)
 
-    def to_c_source(self, padding_value: int) -> str:
-        template_file_name = os.path.join(
-            os.path.dirname(__file__),
+    def to_c_source(self, padding_value: int,
+                    now: Optional[datetime.datetime] = None) -> str:
+        if now is None:
+            now = utc_now()
+        return format_template(
             'client_c_template.c',
+            year=now.year,
+            timestamp=now.isoformat(),
+            client_name=self.nickname,
+            amount_of_groups=len(self.groups),
+            client_config=self.config.to_c_source(padding_value),
+            group_configs=',\n'.join(g.to_c_source(padding_value)
+                                     for g in self.groups),
         )
-        with open(template_file_name, encoding='UTF-8') as template:
-            return template.read().format(
-                year=current_year(),
-                timestamp=iso_timestamp_with_utc_tz(),
-                client_name=self.nickname,
-                amount_of_groups=len(self.groups),
-                client_config=self.config.to_c_source(padding_value),
-                group_configs=',\n'.join(g.to_c_source(padding_value)
-                                         for g in self.groups),
-            )
 
 
 @dataclass
 class ServerSideClientConfig(ConfigStruct):
+    __slots__ = (
+        'sid',
+        'ltk',
+    )
+
     sid: int
     ltk: bytes
 
@@ -174,10 +240,8 @@ class ServerSideClientConfig(ConfigStruct):
     def binformat(cls) -> str:
         return 'B16s'
 
-    def to_bytes(self, endianness: str, padding_value: int) -> bytes:
-        assert struct.calcsize(self.binformat()) == 17
-        return struct.pack(
-            endianness + self.binformat(),
+    def _pack_values(self, padding_value: int) -> Tuple:
+        return (
             self.sid,
             self.ltk,
         )
@@ -192,6 +256,16 @@ class ServerSideClientConfig(ConfigStruct):
 
 @dataclass
 class ServerGroupConfig(ConfigStruct):
+    __slots__ = (
+        'max_ctrnonce_delay',
+        'ctrnonce_upper_limit',
+        'session_duration_millis',
+        'delay_between_ren_notifications_millis',
+        'client_sids_in_group_bitmap',
+        'max_silence_interval_millis',
+        'gid',
+    )
+
     max_ctrnonce_delay: int
     ctrnonce_upper_limit: int
     session_duration_millis: int
@@ -204,10 +278,8 @@ class ServerGroupConfig(ConfigStruct):
     def binformat(cls) -> str:
         return 'IIIIIHB1s'
 
-    def to_bytes(self, endianness: str, padding_value: int) -> bytes:
-        assert struct.calcsize(self.binformat()) == 24
-        return struct.pack(
-            endianness + self.binformat(),
+    def _pack_values(self, padding_value: int) -> Tuple:
+        return (
             self.max_ctrnonce_delay,
             self.ctrnonce_upper_limit,
             self.session_duration_millis,
@@ -235,6 +307,12 @@ class ServerGroupConfig(ConfigStruct):
 
 @dataclass
 class ServerConfig(ConfigStruct):
+    __slots__ = (
+        'header_type',
+        'amount_of_groups',
+        'amount_of_clients',
+    )
+
     header_type: int
     amount_of_groups: int
     amount_of_clients: int
@@ -243,10 +321,8 @@ class ServerConfig(ConfigStruct):
     def binformat(cls) -> str:
         return 'BBB'
 
-    def to_bytes(self, endianness: str, padding_value: int) -> bytes:
-        assert struct.calcsize(self.binformat()) == 3
-        return struct.pack(
-            endianness + self.binformat(),
+    def _pack_values(self, padding_value: int) -> Tuple:
+        return (
             self.amount_of_groups,
             self.amount_of_clients,
             self.header_type,
@@ -268,29 +344,66 @@ class Server:
     groups: List[ServerGroupConfig] = field(default_factory=list)
     nickname: str = 'Server'
 
-    def to_c_source(self, padding_value: int) -> str:
-        template_file_name = os.path.join(
-            os.path.dirname(__file__),
+    def to_c_source(self, padding_value: int,
+                    now: Optional[datetime.datetime] = None) -> str:
+        if now is None:
+            now = utc_now()
+        return format_template(
             'server_c_template.c',
+            year=now.year,
+            timestamp=now.isoformat(),
+            client_name=self.nickname,
+            amount_of_clients=len(self.clients),
+            amount_of_groups=len(self.groups),
+            server_config=self.config.to_c_source(padding_value),
+            client_configs=',\n'.join(c.to_c_source(padding_value)
+                                      for c in self.clients),
+            group_configs=',\n'.join(g.to_c_source(padding_value)
+                                     for g in self.groups),
         )
-        with open(template_file_name, encoding='UTF-8') as template:
-            return template.read().format(
-                year=current_year(),
-                timestamp=iso_timestamp_with_utc_tz(),
-                client_name=self.nickname,
-                amount_of_clients=len(self.clients),
-                amount_of_groups=len(self.groups),
-                server_config=self.config.to_c_source(padding_value),
-                client_configs=',\n'.join(c.to_c_source(padding_value)
-                                          for c in self.clients),
-                group_configs=',\n'.join(g.to_c_source(padding_value)
-                                         for g in self.groups),
-            )
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_template(template_file_name: str
+                    ) -> Tuple[Tuple[str, Optional[str]], ...]:
+    with open(os.path.join(os.path.dirname(__file__), template_file_name),
+              encoding='UTF-8') as template:
+        parsed = tuple(string.Formatter().parse(template.read()))
+    # Only plain {field} placeholders are supported
+    assert all(not spec and conversion is None
+               for _, _, spec, conversion in parsed)
+    return tuple((literal, field_name)
+                 for literal, field_name, _, _ in parsed)
+
+
+def format_template(template_file_name: str, **fields) -> str:
+    """Same as str.format() on the content of the template file, but the
+    file is read and parsed only once."""
+    chunks = []
+    for literal, field_name in _parse_template(template_file_name):
+        chunks.append(literal)
+        if field_name is not None:
+            chunks.append(str(fields[field_name]))
+    return ''.join(chunks)
+
+
+def utc_now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
 
 
 def iso_timestamp_with_utc_tz() -> str:
-    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+    return utc_now().isoformat()
 
 
 def current_year() -> int:
-    return datetime.datetime.now(datetime.timezone.utc).year
+    return utc_now().year
+
+
+# Sizes of the structs in the Hazelnet library, checked once at import
+for _cls, _expected_size in [(ClientConfig, 22),
+                             (ClientGroupConfig, 12),
+                             (ServerSideClientConfig, 17),
+                             (ServerGroupConfig, 24),
+                             (ServerConfig, 3)]:
+    assert struct.calcsize(_cls.binformat()) == _expected_size
+del _cls, _expected_size
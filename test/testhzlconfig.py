@@ -27,7 +27,10 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
 # THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import datetime
 import os
+import struct
+import time
 import unittest
 
 import hzlconfig
@@ -68,5 +71,109 @@ class TestBinaryFileGeneration(unittest.TestCase):
         ))
 
 
+class TestConfig(unittest.TestCase):
+    def test_client_group_configs_are_not_shared(self):
+        config = hzlconfig.hzlconfig.Config.from_json_file(EXAMPLE_FILE_PATH)
+        # Group 0 is the broadcast group, which contains every Client
+        config.clients[0].groups[0].max_ctrnonce_delay += 1
+        self.assertNotEqual(config.clients[0].groups[0],
+                            config.clients[1].groups[0])
+
+
+class TestEndianness(unittest.TestCase):
+    def test_to_bytes_little_endian(self):
+        group = hzlconfig.ClientGroupConfig(1, 2, 3, 4)
+        self.assertEqual(bytes.fromhex('01000000 0200 0300 04 AAAAAA'),
+                         group.to_bytes('<', 0xAA))
+
+    def test_to_bytes_big_endian(self):
+        group = hzlconfig.ClientGroupConfig(1, 2, 3, 4)
+        expected = bytes.fromhex('00000001 0002 0003 04 AAAAAA')
+        self.assertEqual(expected, group.to_bytes('>', 0xAA))
+        self.assertEqual(expected, group.to_bytes('!', 0xAA))
+
+    def test_to_bytes_native(self):
+        group = hzlconfig.ClientGroupConfig(1, 2, 3, 4)
+        expected = struct.pack('IHHB3s', 1, 2, 3, 4, b'\xAA' * 3)
+        self.assertEqual(expected, group.to_bytes('', 0xAA))
+        self.assertEqual(expected, group.to_bytes('@', 0xAA))
+        self.assertEqual(expected, group.to_bytes('=', 0xAA))
+
+
+class TestPackMany(unittest.TestCase):
+    GROUPS = [
+        hzlconfig.ServerGroupConfig(1, 2, 3, 4, 0x05, 6, 0),
+        hzlconfig.ServerGroupConfig(0xFFFFFFFF, 0xFFFFFF, 1000, 500,
+                                    0x0A, 0xFFFF, 1),
+        hzlconfig.ServerGroupConfig(7, 8, 9, 10, 0x03, 11, 2),
+    ]
+
+    def test_pack_many_equals_joined_to_bytes(self):
+        for endianness in ('<', '>', '!', '=', '@', ''):
+            with self.subTest(endianness=endianness):
+                self.assertEqual(
+                    b''.join(group.to_bytes(endianness, 0xAA)
+                             for group in self.GROUPS),
+                    hzlconfig.ServerGroupConfig.pack_many(
+                        self.GROUPS, endianness, 0xAA))
+
+    def test_pack_many_empty(self):
+        self.assertEqual(
+            b'', hzlconfig.ServerGroupConfig.pack_many([], '<', 0xAA))
+
+
+class TestCSourceGeneration(unittest.TestCase):
+    def test_c_source_array_bytes(self):
+        self.assertEqual('\n    {\n        0x00,\n        0xAB,\n    }',
+                         hzlconfig.c_source_array_bytes([0x00, 0xAB]))
+
+    def test_ltk_as_bytearray(self):
+        client = hzlconfig.ServerSideClientConfig(1, bytearray(range(16)))
+        self.assertIn('0x0F,', client.to_c_source(0xAA))
+
+    def test_c_source_array_bytes_out_of_range(self):
+        with self.assertRaises(ValueError):
+            hzlconfig.c_source_array_bytes([-1])
+        with self.assertRaises(ValueError):
+            hzlconfig.c_source_array_bytes([0x100])
+
+    def test_timestamp_is_not_cached(self):
+        first = hzlconfig.iso_timestamp_with_utc_tz()
+        time.sleep(0.01)
+        self.assertNotEqual(first, hzlconfig.iso_timestamp_with_utc_tz())
+
+    def test_timestamp_passed_to_c_source(self):
+        config = hzlconfig.hzlconfig.Config.from_json_file(EXAMPLE_FILE_PATH)
+        now = datetime.datetime(2021, 3, 4, 5, 6, 7,
+                                tzinfo=datetime.timezone.utc)
+        c_source = config.clients[0].to_c_source(0xAA, now)
+        self.assertIn('Copyright © 2021,', c_source)
+        self.assertIn('at 2021-03-04T05:06:07+00:00', c_source)
+
+    def test_format_template_equals_str_format(self):
+        fields = dict(
+            year=2022,
+            timestamp='2022-01-01T00:00:00+00:00',
+            client_name='Alice',
+            amount_of_clients=3,
+            amount_of_groups=2,
+            client_config='{ .sid = 1 }',
+            server_config='{ .headerType = 0 }',
+            client_configs='{ .sid = 1 },\n{ .sid = 2 }',
+            group_configs='{ .gid = 0 },\n{ .gid = 1 }',
+        )
+        for template_file_name in ('client_c_template.c',
+                                   'client_h_template.h',
+                                   'server_c_template.c',
+                                   'server_h_template.h'):
+            with self.subTest(template=template_file_name):
+                with open(os.path.join(os.path.dirname(hzlconfig.__file__),
+                                       template_file_name),
+                          encoding='UTF-8') as template:
+                    expected = template.read().format(**fields)
+                self.assertEqual(expected, hzlconfig.format_template(
+                    template_file_name, **fields))
+
+
 if __name__ == '__main__':
     unittest.main()